@@ -3,50 +3,214 @@
 """Helper functions for signal processing.
 """
 
+import hashlib
+import inspect
+import math
+import os
+import threading
+import warnings
+
 import numpy as np
 import cv2
-from numba import njit, objmode
+import numba
+import scipy.fft
+from numba import njit, prange
+
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+
+# Built by tools/build_dsp_aot.py.
+try:
+    from radarize.utils import _dsp_aot
+except ImportError:
+    _dsp_aot = None
+
+# Threads for the FFTs and the parallel numba kernels. Kept at 1 by default
+# since main.py already runs several create_dataset.py processes side by side;
+# set RADARIZE_NUM_THREADS to override. numba takes it at import, for the
+# importing thread.
+NUM_THREADS = int(os.environ.get("RADARIZE_NUM_THREADS", 1))
+numba.set_num_threads(min(NUM_THREADS, numba.config.NUMBA_NUM_THREADS))
+
+# pyFFTW plans keyed by (shape, dtype, axis, real, threads). Plans may be built from
+# the warm-up thread, so lookups and inserts go through _PLAN_LOCK.
+_PLAN_CACHE = {}
+_PLAN_LOCK = threading.Lock()
+
+# Diagonal loading of Rxx in Capon, relative to its mean eigenvalue, and how
+# many times it may grow 10x for matrices that still fail to factor.
+_CAPON_LOADING = 1e-5
+_CAPON_LOADING_STEPS = 5
+
+# Steering matrices keyed by (ang_est_range, ang_est_resolution, num_ant).
+_STEER_CACHE = {}
+
+# fastmath without nnan/ninf, so log(0) still gives -inf.
+_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+# Signatures shared by the JIT kernels and their AOT builds.
+_RESHAPE_FRAME_SIG = "c8[:,:,::1](i2[::1], unicode_type, c16[::1], i8, i8[::1], i8, i8[::1], i8, i8, b1, b1)"
+_RESHAPE_FRAME_TDM_SIG = "c8[:,:,::1](i2[::1], unicode_type, c16[::1], i8, i8[::1], i8, i8[::1], i8, i8, b1)"
+
+
+class _ScratchPool:
+    """Per-frame work buffers, allocated once per (name, shape, dtype) and reused.
+
+    A buffer is overwritten by the next user of the same key, so results that
+    outlive the current call must be copied out. Not thread-safe.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape, dtype):
+        key = (name, tuple(shape), np.dtype(dtype).str)
+        buf = self._buffers.get(key)
+        if buf is None:
+            if pyfftw is None:
+                buf = np.empty(shape, dtype=dtype)
+            else:
+                buf = pyfftw.empty_aligned(shape, dtype=dtype)
+            self._buffers[key] = buf
+        return buf
+
+
+_SCRATCH = _ScratchPool()
+
+
+def _fft(x, axis, real=False):
+    """FFT along a single axis, reusing a cached pyFFTW plan when available.
+
+    With real=True, x must be real and only the non-negative frequencies are returned.
+    The returned array may be the plan's internal output buffer, so callers must
+    copy it before the next call with the same shape.
+    """
+    if pyfftw is None:
+        if real:
+            return scipy.fft.rfft(x, axis=axis, workers=NUM_THREADS)
+        return scipy.fft.fft(x, axis=axis, workers=NUM_THREADS)
+
+    return _get_plan(x.shape, x.dtype, axis, real)(x)
+
+
+def _get_plan(shape, dtype, axis, real):
+    """Returns the cached pyFFTW plan for this transform, building it if needed."""
+    key = (tuple(shape), np.dtype(dtype).str, axis, real, NUM_THREADS)
+    with _PLAN_LOCK:
+        plan = _PLAN_CACHE.get(key)
+        if plan is None:
+            # Plan on a scratch buffer since FFTW_MEASURE clobbers its input.
+            builder = pyfftw.builders.rfft if real else pyfftw.builders.fft
+            plan = builder(
+                pyfftw.empty_aligned(shape, dtype=dtype),
+                axis=axis,
+                auto_align_input=True,
+                avoid_copy=False,
+                threads=NUM_THREADS,
+                planner_effort="FFTW_MEASURE",
+            )
+            _PLAN_CACHE[key] = plan
+
+    return plan
+
+
+def warm_fft_plans(specs):
+    """Builds pyFFTW plans in a background thread so the first frames don't pay for planning.
+
+    specs is an iterable of (shape, dtype, axis, real) tuples matching the _fft() calls
+    to expect, as returned by range_azimuth_fft_specs() and doppler_azimuth_fft_specs().
+    Returns the started thread, or None without pyFFTW.
+    """
+    if pyfftw is None:
+        return None
+
+    def _warm():
+        for shape, dtype, axis, real in specs:
+            _get_plan(shape, dtype, axis, real)
+
+    thread = threading.Thread(target=_warm, name="fftw-warmup", daemon=True)
+    thread.start()
+
+    return thread
+
+
+def range_azimuth_fft_specs(shape, dtype):
+    """FFT specs for compute_range_azimuth() on radar cubes of this shape and dtype."""
+    real = not np.issubdtype(dtype, np.complexfloating)
+    return [(tuple(shape), np.dtype(dtype), 2, real)]
+
+
+def doppler_azimuth_fft_specs(shape, range_initial_bin=0, range_subsampling_factor=2):
+    """FFT specs for compute_doppler_azimuth() on radar cubes of this shape."""
+    n_chirps, n_vrx, n_samples = shape
+    n_range = len(range(range_initial_bin, n_samples, range_subsampling_factor))
+    return [((n_chirps, n_vrx, n_range), np.dtype(np.complex64), 0, False)]
+
+
+def _fft_demean(x, axis):
+    """FFT along axis of x with its mean along that axis removed.
+
+    The mean is subtracted while filling an aligned complex64 FFT input buffer,
+    which is then transformed in place of a separate demeaned copy.
+    """
+    mean = np.mean(x, axis=axis, keepdims=True)
+    x_ = _SCRATCH.get("fft_demean", x.shape, np.complex64)
+    np.subtract(x, mean, out=x_)
+
+    if pyfftw is None:
+        return scipy.fft.fft(x_, axis=axis, workers=NUM_THREADS, overwrite_x=True)
+
+    return _fft(x_, axis)
+
 
 def reshape_frame(frame, flip_ods_phase=False, flip_aop_phase=False):
     """Use this to reshape RadarFrameFull messages."""
 
     platform = frame.platform
-    adc_output_fmt = frame.adc_output_fmt
-    rx_phase_bias = np.array(
-        [
-            a + 1j * b
-            for a, b in zip(frame.rx_phase_bias[0::2], frame.rx_phase_bias[1::2])
-        ]
-    )
+    adc_output_fmt = int(frame.adc_output_fmt)
+    # Interleaved (re, im) pairs -> complex128 without boxing each element.
+    rx_phase_bias = np.ascontiguousarray(
+        frame.rx_phase_bias, dtype=np.float64
+    ).view(np.complex128)
 
     n_chirps = int(frame.shape[0])
-    rx = np.array([int(x) for x in frame.rx])
+    rx = np.asarray(frame.rx, dtype=np.int64)
     n_rx = int(frame.shape[1])
-    tx = np.array([int(x) for x in frame.tx])
-    n_tx = int(sum(frame.tx))
+    tx = np.asarray(frame.tx, dtype=np.int64)
+    n_tx = int(tx.sum())
     n_samples = int(frame.shape[2])
 
-    return _reshape_frame(
-        np.array(frame.data),
-        platform,
-        adc_output_fmt,
-        rx_phase_bias,
-        n_chirps,
-        rx,
-        n_rx,
-        tx,
-        n_tx,
-        n_samples,
-        flip_ods_phase=flip_ods_phase,
-        flip_aop_phase=flip_aop_phase,
-    )
+    data = np.ascontiguousarray(frame.data, dtype=np.int16)
+    if adc_output_fmt == 0:
+        # Keep real IF samples real so range processing can use rfft.
+        radar_cube = _reshape_frame_real(data, n_chirps, n_rx, n_tx, n_samples)
+    else:
+        radar_cube = _reshape_frame(
+            data,
+            platform,
+            rx_phase_bias,
+            n_chirps,
+            rx,
+            n_rx,
+            tx,
+            n_tx,
+            n_samples,
+            bool(flip_ods_phase),
+            bool(flip_aop_phase),
+        )
+
+    return radar_cube
+
+
+def _reshape_frame_real(data, n_chirps, n_rx, n_tx, n_samples):
+    return data.reshape((n_chirps // n_tx, n_rx * n_tx, n_samples)).astype(np.float32)
 
 
-@njit(cache=True)
 def _reshape_frame(
     data,
     platform,
-    adc_output_fmt,
     rx_phase_bias,
     n_chirps,
     rx,
@@ -57,49 +221,41 @@ def _reshape_frame(
     flip_ods_phase=False,
     flip_aop_phase=False,
 ):
-    if adc_output_fmt > 0:
-
-        radar_cube = np.zeros(len(data) // 2, dtype=np.complex64)
-
-        radar_cube[0::2] = 1j * data[0::4] + data[2::4]
-        radar_cube[1::2] = 1j * data[1::4] + data[3::4]
-
-        radar_cube = radar_cube.reshape((n_chirps, n_rx, n_samples))
-
-        # Apply RX phase correction for each antenna.
-        if "xWR68xx" in platform:
-            if flip_ods_phase:  # Apply 180 deg phase change on RX2 and RX3
-                c = 0
-                for i_rx, rx_on in enumerate(rx):
-                    if rx_on:
-                        if i_rx == 1 or i_rx == 2:
-                            radar_cube[:, c, :] *= -1
-                        c += 1
-            elif flip_aop_phase:  # Apply 180 deg phase change on RX1 and RX3
-                c = 0
-                for i_rx, rx_on in enumerate(rx):
-                    if rx_on:
-                        if i_rx == 0 or i_rx == 2:
-                            radar_cube[:, c, :] *= -1
-                        c += 1
-
-        radar_cube = radar_cube.reshape((n_chirps // n_tx, n_rx * n_tx, n_samples))
-
-        # Apply RX phase correction from calibration.
-        c = 0
-        for i_tx, tx_on in enumerate(tx):
-            if tx_on:
-                for i_rx, rx_on in enumerate(rx):
-                    if rx_on:
-                        v_rx = i_tx * len(rx) + i_rx
-                        # print(v_rx)
-                        radar_cube[:, c, :] *= rx_phase_bias[v_rx]
-                        c += 1
-
-    else:
-        radar_cube = data.reshape((n_chirps // n_tx, n_rx * n_tx, n_samples)).astype(
-            np.complex64
-        )
+    """Complex ADC output only; real samples go through _reshape_frame_real()."""
+    n_vrx = n_rx * n_tx
+
+    # RX antennas that need a 180 deg phase change.
+    flip_a, flip_b = -1, -1
+    if "xWR68xx" in platform:
+        if flip_ods_phase:  # Apply 180 deg phase change on RX2 and RX3
+            flip_a, flip_b = 1, 2
+        elif flip_aop_phase:  # Apply 180 deg phase change on RX1 and RX3
+            flip_a, flip_b = 0, 2
+
+    # Fold the phase flips into the RX phase correction from calibration,
+    # giving one factor per virtual antenna.
+    active_bias = np.ones(n_vrx, dtype=np.complex128)
+    c = 0
+    for i_tx, tx_on in enumerate(tx):
+        if tx_on:
+            for i_rx, rx_on in enumerate(rx):
+                if rx_on:
+                    v_rx = i_tx * len(rx) + i_rx
+                    active_bias[c] = rx_phase_bias[v_rx]
+                    if i_rx == flip_a or i_rx == flip_b:
+                        active_bias[c] = -active_bias[c]
+                    c += 1
+
+    # Deinterleave (Q0, Q1, I0, I1) ADC words and apply the per-antenna
+    # factor in the same pass.
+    radar_cube = np.empty(len(data) // 2, dtype=np.complex64)
+    for row in range(len(radar_cube) // n_samples):
+        bias = active_bias[row % n_vrx]
+        for m in range(row * n_samples, (row + 1) * n_samples):
+            k = 2 * m - (m & 1)
+            radar_cube[m] = bias * complex(data[k + 2], data[k])
+
+    radar_cube = radar_cube.reshape((n_chirps // n_tx, n_vrx, n_samples))
 
     return radar_cube
 
@@ -108,56 +264,68 @@ def reshape_frame_tdm(frame, flip_ods_phase=False):
     """Use this to reshape RadarFrameFull messages."""
 
     platform = frame.platform
-    adc_output_fmt = frame.adc_output_fmt
-    rx_phase_bias = np.array(
-        [
-            a + 1j * b
-            for a, b in zip(frame.rx_phase_bias[0::2], frame.rx_phase_bias[1::2])
-        ]
-    )
+    adc_output_fmt = int(frame.adc_output_fmt)
+    # Interleaved (re, im) pairs -> complex128 without boxing each element.
+    rx_phase_bias = np.ascontiguousarray(
+        frame.rx_phase_bias, dtype=np.float64
+    ).view(np.complex128)
 
     n_chirps = int(frame.shape[0])
-    rx = np.array([int(x) for x in frame.rx])
+    rx = np.asarray(frame.rx, dtype=np.int64)
     n_rx = int(frame.shape[1])
-    tx = np.array([int(x) for x in frame.tx])
-    n_tx = int(sum(frame.tx))
+    tx = np.asarray(frame.tx, dtype=np.int64)
+    n_tx = int(tx.sum())
     n_samples = int(frame.shape[2])
 
-    return _reshape_frame_tdm(
-        np.array(frame.data),
-        platform,
-        adc_output_fmt,
-        rx_phase_bias,
-        n_chirps,
-        rx,
-        n_rx,
-        tx,
-        n_tx,
-        n_samples,
-        flip_ods_phase=flip_ods_phase,
-    )
+    data = np.ascontiguousarray(frame.data, dtype=np.int16)
+    if adc_output_fmt == 0:
+        radar_cube = _tdm(
+            _reshape_frame_real(data, n_chirps, n_rx, n_tx, n_samples), n_tx, n_rx
+        )
+    else:
+        radar_cube = _reshape_frame_tdm(
+            data,
+            platform,
+            rx_phase_bias,
+            n_chirps,
+            rx,
+            n_rx,
+            tx,
+            n_tx,
+            n_samples,
+            bool(flip_ods_phase),
+        )
+
+    return radar_cube
 
 
-@njit(cache=True)
+@njit(
+    ["c8[:,:,::1](c8[:,:,::1], i8, i8)", "f4[:,:,::1](f4[:,:,::1], i8, i8)"],
+    cache=True,
+)
 def _tdm(radar_cube, n_tx, n_rx):
-    radar_cube_tdm = np.zeros(
-        (radar_cube.shape[0] * n_tx, radar_cube.shape[1], radar_cube.shape[2]),
-        dtype=np.complex64,
+    n_chirps, n_vrx, n_samples = radar_cube.shape
+    radar_cube_tdm = np.empty(
+        (n_chirps * n_tx, n_vrx, n_samples), dtype=radar_cube.dtype
     )
 
-    for i in range(n_tx):
-        radar_cube_tdm[i::n_tx, i * n_rx : (i + 1) * n_rx] = radar_cube[
-            :, i * n_rx : (i + 1) * n_rx
-        ]
+    # Write every element once: chirp i of each group only keeps TX block i.
+    for c in range(n_chirps):
+        for i in range(n_tx):
+            for v in range(n_vrx):
+                if v // n_rx == i:
+                    for s in range(n_samples):
+                        radar_cube_tdm[c * n_tx + i, v, s] = radar_cube[c, v, s]
+                else:
+                    for s in range(n_samples):
+                        radar_cube_tdm[c * n_tx + i, v, s] = 0
 
     return radar_cube_tdm
 
 
-@njit(cache=True)
 def _reshape_frame_tdm(
     data,
     platform,
-    adc_output_fmt,
     rx_phase_bias,
     n_chirps,
     rx,
@@ -171,7 +339,6 @@ def _reshape_frame_tdm(
     radar_cube = _reshape_frame(
         data,
         platform,
-        adc_output_fmt,
         rx_phase_bias,
         n_chirps,
         rx,
@@ -180,6 +347,7 @@ def _reshape_frame_tdm(
         n_tx,
         n_samples,
         flip_ods_phase,
+        False,
     )
 
     radar_cube_tdm = _tdm(radar_cube, n_tx, n_rx)
@@ -187,118 +355,306 @@ def _reshape_frame_tdm(
     return radar_cube_tdm
 
 
+def _aot_source_hash():
+    """Hash of the source and signatures of the kernels exported to _dsp_aot."""
+    h = hashlib.sha256()
+    for f in (_reshape_frame, _reshape_frame_tdm, _tdm):
+        h.update(inspect.getsource(getattr(f, "py_func", f)).encode())
+    h.update(_RESHAPE_FRAME_SIG.encode())
+    h.update(_RESHAPE_FRAME_TDM_SIG.encode())
+    return int.from_bytes(h.digest()[:8], "little", signed=True)
+
+
+if _dsp_aot is not None and (
+    not hasattr(_dsp_aot, "source_hash")
+    or _dsp_aot.source_hash() != _aot_source_hash()
+):
+    warnings.warn(
+        "radarize.utils._dsp_aot is out of date, using the JIT kernels instead. "
+        "Rerun tools/build_dsp_aot.py to rebuild it."
+    )
+    _dsp_aot = None
+
+# Only compile the JIT kernels when there is no AOT build to use.
+if _dsp_aot is None:
+    _reshape_frame = njit(_RESHAPE_FRAME_SIG, cache=True)(_reshape_frame)
+    _reshape_frame_tdm = njit(_RESHAPE_FRAME_TDM_SIG, cache=True)(_reshape_frame_tdm)
+else:
+    _reshape_frame = _dsp_aot.reshape_frame
+    _reshape_frame_tdm = _dsp_aot.reshape_frame_tdm
+
+
 @njit(cache=True)
 def get_mean(x, axis=0):
     return np.sum(x, axis=axis) / x.shape[axis]
 
 
-@njit(cache=True)
 def cov_matrix(x):
     """Calculates the spatial covariance matrix (Rxx) for a given set of input data (x=inputData).
-        Assumes rows denote Vrx axis.
+        Assumes rows denote Vrx axis. Leading axes are treated as a batch.
     """
 
-    _, num_adc_samples = x.shape
-    x_T = x.T
-    Rxx = x @ np.conjugate(x_T)
-    Rxx = np.divide(Rxx, num_adc_samples)
+    x_ = np.ascontiguousarray(x, dtype=np.complex64).reshape((-1,) + x.shape[-2:])
+    Rxx = _cov_matrix(x_)
+
+    return Rxx.reshape(x.shape[:-2] + Rxx.shape[1:])
+
+
+@njit("c8[:,:,::1](c8[:,:,::1])", parallel=True, fastmath=_FASTMATH, cache=True)
+def _cov_matrix(x):
+    """Hermitian rank-k update x @ x^H / n_samples for a stack of matrices.
+    Only the upper triangle is accumulated and then mirrored, like BLAS ?herk,
+    and x^H is never materialized.
+    """
+    n_batch, n_vrx, num_adc_samples = x.shape
+    scale = np.float32(1) / np.float32(num_adc_samples)
+
+    Rxx = np.empty((n_batch, n_vrx, n_vrx), dtype=np.complex64)
+    for b in prange(n_batch):
+        for i in range(n_vrx):
+            for k in range(i, n_vrx):
+                re = np.float32(0)
+                im = np.float32(0)
+                for j in range(num_adc_samples):
+                    x_i = x[b, i, j]
+                    x_k = x[b, k, j]
+                    re += x_i.real * x_k.real + x_i.imag * x_k.imag
+                    im += x_i.imag * x_k.real - x_i.real * x_k.imag
+                Rxx[b, i, k] = complex(re * scale, im * scale)
+                Rxx[b, k, i] = complex(re * scale, -im * scale)
 
     return Rxx
 
-@njit(cache=True)
 def gen_steering_vec(ang_est_range, ang_est_resolution, num_ant):
     """Generate a steering vector for AOA estimation given the theta range, theta resolution, and number of antennas
     """
     num_vec = (2 * ang_est_range + 1) / ang_est_resolution + 1
     num_vec = int(round(num_vec))
-    steering_vectors = np.zeros((num_vec, num_ant), dtype="complex64")
-    for kk in range(num_vec):
-        for jj in range(num_ant):
-            mag = (
-                -1
-                * np.pi
-                * jj
-                * np.sin((-ang_est_range - 1 + kk * ang_est_resolution) * np.pi / 180)
-            )
-            real = np.cos(mag)
-            imag = np.sin(mag)
-
-            steering_vectors[kk, jj] = complex(real, imag)
+    angles = np.deg2rad(-ang_est_range - 1 + np.arange(num_vec) * ang_est_resolution)
+    mag = -np.pi * np.outer(np.sin(angles), np.arange(num_ant))
+    steering_vectors = np.exp(1j * mag).astype(np.complex64)
 
     return (num_vec, steering_vectors)
 
 
-@njit(cache=True)
+def _get_steering(ang_est_range, ang_est_resolution, num_ant):
+    """Return cached (steering_vec, steering_vec_T, steering_vec_soa) for the given grid.
+
+    steering_vec_T is C-contiguous and steering_vec_soa is the real block form
+    from _steering_soa(). The arrays are shared and must not be modified.
+    """
+    key = (ang_est_range, ang_est_resolution, num_ant)
+    steering = _STEER_CACHE.get(key)
+    if steering is None:
+        _, steering_vec = gen_steering_vec(ang_est_range, ang_est_resolution, num_ant)
+        steering = (
+            steering_vec,
+            np.ascontiguousarray(steering_vec.T),
+            _steering_soa(steering_vec),
+        )
+        _STEER_CACHE[key] = steering
+
+    return steering
+
+
 def aoa_bartlett(steering_vec, sig_in):
     """
     Perform AOA estimation using Bartlett Beamforming on a given input signal (sig_in).
     """
-    n_theta = steering_vec.shape[0]
-    n_rx = sig_in.shape[1]
-    n_range = sig_in.shape[2]
-    y = np.zeros((sig_in.shape[0], n_theta, n_range), dtype="complex64")
-    for i in range(sig_in.shape[0]):
-        y[i] = np.conjugate(steering_vec) @ sig_in[i]
+    y = _aoa_bartlett_soa(_steering_soa(steering_vec), sig_in)
+    y = y[0] + 1j * y[1]
+    y = np.transpose(y, (1, 0, 2))
     return y
 
 
-@njit(cache=True)
-def aoa_capon(x, steering_vector):
+def _steering_soa(steering_vec):
+    """Real float32 block form [[re(a), im(a)], [-im(a), re(a)]] of conj(steering_vec)."""
+    sv_re = steering_vec.real
+    sv_im = steering_vec.imag
+    return np.block([[sv_re, sv_im], [-sv_im, sv_re]]).astype(np.float32)
+
+
+def _aoa_bartlett_soa(steering_vec_soa, sig_in):
     """
-    Perform AOA estimation using Capon (MVDR) Beamforming on a rx by chirp slice
+    Bartlett beamforming with real and imaginary parts kept in separate float32 planes.
+
+    conj(steering_vec) @ sig_in is evaluated for all frames as one real GEMM,
+    steering_vec_soa @ [re(x); im(x)], avoiding complex interleaving.
+    Takes the block steering matrix from _steering_soa().
+    Returns the stacked (re, im) planes, each laid out as (n_theta, n_frames, n_range),
+    in a scratch buffer that the next call reuses.
+    """
+    n_theta = steering_vec_soa.shape[0] // 2
+    n_frames, n_rx, n_range = sig_in.shape
+
+    sig_in_ = _SCRATCH.get("bartlett_in", (2, n_rx, n_frames, n_range), np.float32)
+    sig_in_[0] = np.transpose(sig_in.real, (1, 0, 2))
+    sig_in_[1] = np.transpose(sig_in.imag, (1, 0, 2))
+
+    y = _SCRATCH.get("bartlett_out", (2, n_theta, n_frames, n_range), np.float32)
+    np.matmul(
+        steering_vec_soa,
+        sig_in_.reshape((2 * n_rx, n_frames * n_range)),
+        out=y.reshape((2 * n_theta, n_frames * n_range)),
+    )
+    return y
+
+
+def aoa_capon(x, steering_vector_T):
+    """
+    Perform AOA estimation using Capon (MVDR) Beamforming on a rx by chirp slice,
+    or on a stack of them along the leading axes.
+    Takes the transposed steering vectors from _get_steering().
+    Rank-deficient slices are handled through diagonal loading; only a singular
+    one (e.g. all zeros) raises LinAlgError, as the per-slice inverse did.
     """
 
     Rxx = cov_matrix(x)
-    Rxx_inv = np.linalg.inv(Rxx).astype(np.complex64)
-    first = Rxx_inv @ steering_vector.T
-    den = np.zeros(first.shape[1], dtype=np.complex64)
-    steering_vector_conj = steering_vector.conj()
-    first_T = first.T
-    for i in range(first_T.shape[0]):
-        for j in range(first_T.shape[1]):
-            den[i] += steering_vector_conj[i, j] * first_T[i, j]
-    den = np.reciprocal(den)
+    batch_shape = Rxx.shape[:-2]
+    Rxx = np.ascontiguousarray(Rxx, dtype=np.complex64).reshape((-1,) + Rxx.shape[-2:])
 
-    weights = first @ den
+    den, weights, ok = _aoa_capon(Rxx, steering_vector_T)
+    if not ok.all():
+        raise np.linalg.LinAlgError("Matrix is singular to machine precision.")
 
-    return den, weights
+    return (
+        den.reshape(batch_shape + den.shape[1:]),
+        weights.reshape(batch_shape + weights.shape[1:]),
+    )
 
 
-@njit(cache=True)
-def compute_range_azimuth(radar_cube, angle_res=1, angle_range=90, method="apes"):
+@njit(fastmath=_FASTMATH, cache=True)
+def _cholesky(A, L, load):
+    """Writes the lower Cholesky factor of the Hermitian matrix A + load * I into L.
+    Returns False on a non-positive pivot instead of raising, so it can be
+    called from prange loops.
+    """
+    n = A.shape[0]
+    for j in range(n):
+        d = A[j, j].real + load
+        for k in range(j):
+            d -= L[j, k].real * L[j, k].real + L[j, k].imag * L[j, k].imag
+        # Also rejects NaN.
+        if not d > 0:
+            return False
+        l_jj = np.float32(math.sqrt(d))
+        L[j, j] = l_jj
+        for i in range(j + 1, n):
+            s = A[i, j]
+            for k in range(j):
+                s -= L[i, k] * np.conj(L[j, k])
+            L[i, j] = s / l_jj
+
+    return True
+
+
+@njit(
+    "Tuple((c8[:,::1], c8[:,::1], b1[::1]))(c8[:,:,::1], c8[:,::1])",
+    parallel=True,
+    fastmath=_FASTMATH,
+    cache=True,
+)
+def _aoa_capon(Rxx, steering_vector_T):
+    """Capon denominators and weights for a stack of covariance matrices.
+    Each matrix is independent, so they are spread across threads.
+
+    Rxx is Hermitian, so instead of inverting it, factor
+    Rxx = L L^H and use sv^H Rxx^-1 sv = |L^-1 sv|^2.
+    Rxx is only positive semi-definite in general (e.g. two identical virtual
+    antennas), so it is diagonally loaded relative to its mean eigenvalue, and
+    the loading is raised if the factorization still fails.
+    Exceptions can't leave a prange loop cleanly, so matrices that fail to
+    factor are flagged in ok and their outputs left undefined.
+    """
+    n_batch, n_ant, _ = Rxx.shape
+    n_theta = steering_vector_T.shape[1]
+
+    den = np.empty((n_batch, n_theta), dtype=np.complex64)
+    weights = np.empty((n_batch, n_ant), dtype=np.complex64)
+    ok = np.empty(n_batch, dtype=np.bool_)
+    for b in prange(n_batch):
+        trace = np.float32(0)
+        for i in range(n_ant):
+            trace += Rxx[b, i, i].real
+        load = np.float32(_CAPON_LOADING) * trace / np.float32(n_ant)
+
+        L = np.zeros((n_ant, n_ant), dtype=np.complex64)
+        ok[b] = False
+        for _ in range(_CAPON_LOADING_STEPS):
+            if _cholesky(Rxx[b], L, load):
+                ok[b] = True
+                break
+            load *= np.float32(10)
+        if not ok[b]:
+            continue
+
+        # Forward substitution for z = L^-1 sv one antenna row at a time,
+        # accumulating |z|^2 as each row is finished.
+        z = np.empty((n_ant, n_theta), dtype=np.complex64)
+        power = np.zeros(n_theta, dtype=np.float32)
+        for i in range(n_ant):
+            for t in range(n_theta):
+                z[i, t] = steering_vector_T[i, t]
+            for k in range(i):
+                l_ik = L[i, k]
+                for t in range(n_theta):
+                    z[i, t] -= l_ik * z[k, t]
+            l_ii = np.float32(1) / L[i, i].real
+            for t in range(n_theta):
+                z[i, t] *= l_ii
+                power[t] += z[i, t].real * z[i, t].real + z[i, t].imag * z[i, t].imag
+        den_b = (np.float32(1) / power).astype(np.complex64)
+
+        # weights = Rxx^-1 (sv @ den), solved against L then L^H.
+        w = steering_vector_T @ den_b
+        for i in range(n_ant):
+            for k in range(i):
+                w[i] -= L[i, k] * w[k]
+            w[i] /= L[i, i]
+        for i in range(n_ant - 1, -1, -1):
+            for k in range(i + 1, n_ant):
+                w[i] -= np.conj(L[k, i]) * w[k]
+            w[i] /= np.conj(L[i, i])
+
+        den[b] = den_b
+        weights[b] = w
+
+    return den, weights, ok
 
-    n_range_bins = radar_cube.shape[2]
-    n_rx = radar_cube.shape[1]
-    n_chirps = radar_cube.shape[0]
-    n_angle_bins = (angle_range * 2 + 1) // angle_res + 1
 
-    range_cube = np.zeros_like(radar_cube)
-    with objmode(range_cube="complex128[:,:,:]"):
-        range_cube = np.fft.fft(radar_cube, axis=2)
-    range_cube = np.transpose(range_cube, (2, 1, 0))
-    range_cube = np.asarray(range_cube, dtype=np.complex64)
+def compute_range_azimuth(radar_cube, angle_res=1, angle_range=90, method="apes"):
 
-    range_cube_ = np.zeros(
-        (range_cube.shape[0], range_cube.shape[1], range_cube.shape[2]),
-        dtype=np.complex64,
-    )
+    if method != "capon":
+        raise ValueError("Unknown method")
+
+    # Range processing. Real IF samples only need the non-negative range bins.
+    range_cube = _fft(radar_cube, axis=2, real=np.isrealobj(radar_cube))
+    range_cube_ = _SCRATCH.get("range_cube", range_cube.shape[::-1], np.complex64)
+    np.copyto(range_cube_, np.transpose(range_cube, (2, 1, 0)))
+    range_cube = range_cube_
 
-    _, steering_vec = gen_steering_vec(angle_range, angle_res, n_rx)
+    _, steering_vec_T, _ = _get_steering(angle_range, angle_res, range_cube.shape[1])
 
-    range_azimuth = np.zeros((n_range_bins, n_angle_bins), dtype=np.complex_)
-    for r_idx in range(n_range_bins):
-        range_cube_[r_idx] = range_cube[r_idx]
-        steering_vec_ = steering_vec
-        if method == "capon":
-            range_azimuth[r_idx, :], _ = aoa_capon(range_cube_[r_idx], steering_vec_)
-        else:
-            raise ValueError("Unknown method")
+    # Azimuth processing on all range bins at once.
+    range_azimuth, _ = aoa_capon(range_cube, steering_vec_T)
 
-    range_azimuth = np.log(np.abs(range_azimuth))
+    range_azimuth = _log_abs(range_azimuth)
 
     return range_azimuth
 
-@njit(cache=True)
+
+@njit("f8[:,::1](c8[:,::1])", parallel=True, fastmath=_FASTMATH, cache=True)
+def _log_abs(x):
+    """log(|x|) computed as 0.5 * log(re^2 + im^2) in a single pass."""
+    out = np.empty(x.shape, dtype=np.float64)
+    for i in prange(x.shape[0]):
+        for j in range(x.shape[1]):
+            re = np.float64(x[i, j].real)
+            im = np.float64(x[i, j].imag)
+            out[i, j] = 0.5 * math.log(re * re + im * im)
+    return out
+
+
 def compute_doppler_azimuth(
     radar_cube,
     angle_res=1,
@@ -307,36 +663,56 @@ def compute_doppler_azimuth(
     range_subsampling_factor=2,
 ):
 
-    n_chirps = radar_cube.shape[0]
-    n_rx = radar_cube.shape[1]
-    n_samples = radar_cube.shape[2]
-    n_angle_bins = (angle_range * 2) // angle_res + 1
-
     # Subsample range bins.
     radar_cube_ = radar_cube[:, :, range_initial_bin::range_subsampling_factor]
-    radar_cube_ -= get_mean(radar_cube_, axis=0)
 
-    # Doppler processing.
-    doppler_cube = np.zeros_like(radar_cube_)
-    with objmode(doppler_cube="complex128[:,:,:]"):
-        doppler_cube = np.fft.fft(radar_cube_, axis=0)
-        doppler_cube = np.fft.fftshift(doppler_cube, axes=0)
-    doppler_cube = np.asarray(doppler_cube, dtype=np.complex64)
+    # Doppler processing, with static clutter removed on the way into the FFT.
+    doppler_cube = _fft_demean(radar_cube_, axis=0)
+
+    _, _, steering_vec_soa = _get_steering(
+        angle_range, angle_res, doppler_cube.shape[1]
+    )
 
     # Azimuth processing.
-    _, steering_vec = gen_steering_vec(angle_range, angle_res, n_rx)
+    doppler_azimuth_cube = _aoa_bartlett_soa(steering_vec_soa, doppler_cube)
 
-    doppler_azimuth_cube = aoa_bartlett(steering_vec, doppler_cube)
-    # doppler_azimuth_cube = doppler_azimuth_cube[:,:,::5]
-    doppler_azimuth_cube -= np.expand_dims(
-        get_mean(doppler_azimuth_cube, axis=2), axis=2
-    )
+    doppler_azimuth = _log_range_power(doppler_azimuth_cube)
 
-    doppler_azimuth = np.log(get_mean(np.abs(doppler_azimuth_cube) ** 2, axis=2))
+    # Each doppler bin is beamformed independently, so shift the small heatmap
+    # instead of the cube.
+    doppler_azimuth = np.fft.fftshift(doppler_azimuth, axes=0)
 
     return doppler_azimuth
 
 
+@njit("f4[:,::1](f4[:,:,:,::1])", parallel=True, fastmath=_FASTMATH, cache=True)
+def _log_range_power(x):
+    """
+    log of the mean power over range after removing the mean over range.
+    Takes the (re, im) planes from _aoa_bartlett_soa(), each (n_theta, n_frames, n_range),
+    and returns (n_frames, n_theta).
+    """
+    _, n_theta, n_frames, n_range = x.shape
+    out = np.empty((n_frames, n_theta), dtype=np.float32)
+    for t in prange(n_theta):
+        for f in range(n_frames):
+            mean_re = np.float32(0)
+            mean_im = np.float32(0)
+            for r in range(n_range):
+                mean_re += x[0, t, f, r]
+                mean_im += x[1, t, f, r]
+            mean_re /= np.float32(n_range)
+            mean_im /= np.float32(n_range)
+
+            power = np.float32(0)
+            for r in range(n_range):
+                d_re = x[0, t, f, r] - mean_re
+                d_im = x[1, t, f, r] - mean_im
+                power += d_re * d_re + d_im * d_im
+            out[f, t] = math.log(power / np.float32(n_range))
+    return out
+
+
 def normalize(data, min_val=None, max_val=None):
     """
     Normalize floats to [0.0, 1.0].
@@ -370,6 +746,8 @@ def preprocess_1d_radar_1843(
 
     heatmap = normalize(heatmap, min_val=min_val, max_val=max_val)
 
+    # INTER_AREA already reduces to a block mean for integer ratios, and OpenCV's
+    # kernel beats a numpy reshape().mean() pool on these small heatmaps.
     heatmap = cv2.resize(heatmap, resize_shape, interpolation=cv2.INTER_AREA)
 
     return heatmap
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+"""
+Ahead-of-time compiles the radar frame kernels in radarize.utils.dsp.
+
+Writes radarize/utils/_dsp_aot.*.so, which dsp uses in place of the JIT
+versions of _reshape_frame and _reshape_frame_tdm. The module records a hash
+of the kernels' source, and dsp falls back to JIT with a warning once they
+change, until this is rerun.
+"""
+
+import os
+import sys
+
+from numba.pycc import CC
+
+# Load the JIT kernels even if an AOT module was built before.
+sys.modules["radarize.utils._dsp_aot"] = None
+from radarize.utils import dsp
+
+
+def main():
+    cc = CC("_dsp_aot")
+    cc.output_dir = os.path.dirname(os.path.abspath(dsp.__file__))
+
+    cc.export("reshape_frame", dsp._RESHAPE_FRAME_SIG)(dsp._reshape_frame.py_func)
+    cc.export("reshape_frame_tdm", dsp._RESHAPE_FRAME_TDM_SIG)(
+        dsp._reshape_frame_tdm.py_func
+    )
+
+    source_hash = dsp._aot_source_hash()
+    cc.export("source_hash", "i8()")(lambda: source_hash)
+
+    cc.compile()
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,28 @@ from sensor_msgs import point_cloud2
 from radarize.config import cfg, update_config
 from radarize.utils import dsp, grid_map, image_tools, radar_config
 
+def _buffered_like(radar_cube, radar_buffer_len):
+    """Zero cube shaped like radar_buffer_len frames of radar_cube concatenated."""
+    n_chirps = radar_buffer_len * radar_cube.shape[0]
+    return np.zeros((n_chirps,) + radar_cube.shape[1:], dtype=radar_cube.dtype)
+
+
+def _azimuth_antennas(radar_cube):
+    """TDM cube of the antennas used for range-azimuth heatmaps."""
+    radar_cube_a = np.ascontiguousarray(radar_cube[:, :8, :])
+    return dsp._tdm(radar_cube_a, 2, 4)
+
+
+def _elevation_antennas(radar_cube):
+    """Elevation beamforming over virtual antennas [2,3,4,5,8,9,10,11]."""
+    return (radar_cube[:, 2:6, :] + radar_cube[:, 8:12, :]) / 2
+
+
+def _azimuth_elevation_antennas(radar_cube):
+    """TDM cube of the elevation-beamformed antennas for range-azimuth heatmaps."""
+    return dsp._tdm(_elevation_antennas(radar_cube), 2, 4)
+
+
 def create_radar_bev(
     bag,
     radar_params,
@@ -53,6 +75,15 @@ def create_radar_bev(
         # 1843/1843AOP
         radar_cube = dsp.reshape_frame(msg)
 
+        if i == 0:
+            # Plan the FFTs for the buffered cube while the buffer fills.
+            radar_cube_w = _azimuth_antennas(
+                _buffered_like(radar_cube, radar_buffer_len)
+            )
+            dsp.warm_fft_plans(
+                dsp.range_azimuth_fft_specs(radar_cube_w.shape, radar_cube_w.dtype)
+            )
+
         # Accumulate radar cubes in buffer.
         radar_buffer.append(radar_cube)
         if len(radar_buffer) < radar_buffer.maxlen:
@@ -60,8 +91,7 @@ def create_radar_bev(
         radar_cube = np.concatenate(radar_buffer, axis=0)
 
         # Choose antennas for range-azimuth heatmap.
-        radar_cube_a = radar_cube[:, :8, :]
-        radar_cube_a = dsp._tdm(radar_cube_a, 2, 4)
+        radar_cube_a = _azimuth_antennas(radar_cube)
 
         # All images should be C x H x W
         heatmap = np.stack(
@@ -141,6 +171,15 @@ def create_radar_bev_elevation(
         # 1843/1843AOP
         radar_cube = dsp.reshape_frame(msg)
 
+        if i == 0:
+            # Plan the FFTs for the buffered cube while the buffer fills.
+            radar_cube_w = _azimuth_elevation_antennas(
+                _buffered_like(radar_cube, radar_buffer_len)
+            )
+            dsp.warm_fft_plans(
+                dsp.range_azimuth_fft_specs(radar_cube_w.shape, radar_cube_w.dtype)
+            )
+
         # Accumulate radar cubes in buffer.
         radar_buffer.append(radar_cube)
         if len(radar_buffer) < radar_buffer.maxlen:
@@ -148,10 +187,7 @@ def create_radar_bev_elevation(
         radar_cube = np.concatenate(radar_buffer, axis=0)
 
         # Choose antennas for range-azimuth heatmap.
-        radar_cube_e = (
-            radar_cube[:, 2:6, :] + radar_cube[:, 8:12, :]
-        ) / 2  # [2,3,4,5,8,9,10,11]
-        radar_cube_e = dsp._tdm(radar_cube_e, 2, 4)
+        radar_cube_e = _azimuth_elevation_antennas(radar_cube)
 
         # All images should be C x H x W
         heatmap = np.stack(
@@ -223,6 +259,16 @@ def create_radar_doppler(
         # Convert radar msg to radar cube.
         radar_cube = dsp.reshape_frame(msg)
 
+        if i == 0:
+            # Plan the FFTs for the buffered cube while the buffer fills.
+            radar_cube_w = _buffered_like(radar_cube, radar_buffer_len)
+            dsp.warm_fft_plans(
+                dsp.doppler_azimuth_fft_specs(
+                    radar_cube_w.shape,
+                    range_subsampling_factor=range_subsampling_factor,
+                )
+            )
+
         # Accumulate radar cubes in buffer.
         radar_buffer.append(radar_cube)
         if len(radar_buffer) < radar_buffer.maxlen:
@@ -279,6 +325,18 @@ def create_radar_doppler_elevation(
         # Convert radar msg to radar cube.
         radar_cube = dsp.reshape_frame(msg)
 
+        if i == 0:
+            # Plan the FFTs for the buffered cube while the buffer fills.
+            radar_cube_w = _elevation_antennas(
+                _buffered_like(radar_cube, radar_buffer_len)
+            )
+            dsp.warm_fft_plans(
+                dsp.doppler_azimuth_fft_specs(
+                    radar_cube_w.shape,
+                    range_subsampling_factor=range_subsampling_factor,
+                )
+            )
+
         # Accumulate radar cubes in buffer.
         radar_buffer.append(radar_cube)
         if len(radar_buffer) < radar_buffer.maxlen:
@@ -286,9 +344,7 @@ def create_radar_doppler_elevation(
         radar_cube = np.concatenate(radar_buffer, axis=0)
 
         # Do elevation beamforming.
-        radar_cube_e = (
-            radar_cube[:, 2:6, :] + radar_cube[:, 8:12, :]
-        ) / 2  # [2,3,4,5,8,9,10,11]
+        radar_cube_e = _elevation_antennas(radar_cube)
 
         radar_cube_h = radar_cube_e[::1]
         heatmap_h = dsp.preprocess_1d_radar_1843(